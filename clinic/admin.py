@@ -1,5 +1,28 @@
 from django.contrib import admin
-from .models import Specialization, Doctor, Service, Promotion, Appointment, Review, DoctorSpecialization, ServiceDoctor
+from django.db.models import BooleanField, Count, ExpressionWrapper
+from django.forms.models import BaseInlineFormSet
+from django.utils import timezone
+from .models import Specialization, Doctor, Service, Promotion, Appointment, Review, DoctorSpecialization, ServiceDoctor, Client, Pet
+from .promotions import active_q, upcoming_q, expired_q
+from .contacts import looks_like_phone, normalize_phone, normalize_email, normalize_name
+
+# Фильтр акций по статусу - условие вычисляется в SQL
+class PromotionStatusFilter(admin.SimpleListFilter):
+    title = "Статус"
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('active', "Активные"),
+            ('upcoming', "Предстоящие"),
+            ('expired', "Завершенные"),
+        )
+
+    def queryset(self, request, queryset):
+        conditions = {'active': active_q, 'upcoming': upcoming_q, 'expired': expired_q}
+        if self.value() in conditions:
+            return queryset.filter(conditions[self.value()](timezone.localdate()))
+        return queryset
 
 # Inline для врача (специализации)
 class DoctorSpecializationInline(admin.TabularInline):
@@ -111,7 +134,7 @@ class ServiceAdmin(admin.ModelAdmin):
 class PromotionAdmin(admin.ModelAdmin):
     list_display = ('title', 'start_date', 'end_date', 'is_active')
     list_display_links = ('title',)
-    list_filter = ('start_date', 'end_date')
+    list_filter = (PromotionStatusFilter, 'start_date', 'end_date')
     search_fields = ('title', 'text')
     date_hierarchy = 'start_date'
     
@@ -124,11 +147,82 @@ class PromotionAdmin(admin.ModelAdmin):
         }),
     )
 
-    @admin.display(description="Активна?", boolean=True)
+    def get_queryset(self, request):
+        # Признак активности считаем в том же запросе, а не для каждой строки
+        return super().get_queryset(request).annotate(
+            is_active_now=ExpressionWrapper(active_q(timezone.localdate()), output_field=BooleanField())
+        )
+
+    @admin.display(description="Активна?", boolean=True, ordering='is_active_now')
     def is_active(self, obj):
-        from django.utils import timezone
-        now = timezone.now().date()
-        return obj.start_date <= now <= obj.end_date
+        return obj.is_active_now
+
+# Поиск по телефону или email - точное совпадение по индексу вместо LIKE по всем полям
+def search_by_contact_key(queryset, search_term, phone_field, email_field):
+    term = search_term.strip()
+    if looks_like_phone(term):
+        return queryset.filter(**{phone_field: normalize_phone(term)})
+    if '@' in term and ' ' not in term:
+        return queryset.filter(**{email_field: normalize_email(term)})
+    return None
+
+# Inline для клиента (питомцы)
+class PetInlineFormSet(BaseInlineFormSet):
+    def clean(self):
+        # Клички, отличающиеся только регистром или пробелами, - один и тот же питомец
+        super().clean()
+        seen = set()
+        for form in self.forms:
+            name = form.cleaned_data.get('name') if hasattr(form, 'cleaned_data') else None
+            if not name or self.can_delete and self._should_delete_form(form):
+                continue
+            name_key = normalize_name(name)
+            if name_key in seen:
+                form.add_error('name', "Питомец с такой кличкой уже есть в списке.")
+            seen.add(name_key)
+
+class PetInline(admin.TabularInline):
+    model = Pet
+    formset = PetInlineFormSet
+    extra = 0
+    fields = ('name',)
+
+# Inline для клиента (история заявок)
+class ClientAppointmentInline(admin.TabularInline):
+    model = Appointment
+    extra = 0
+    fields = ('created_at', 'pet_name', 'service', 'desired_date', 'status')
+    readonly_fields = fields
+    show_change_link = True
+    can_delete = False
+    verbose_name_plural = "История заявок"
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('service')
+
+@admin.register(Client)
+class ClientAdmin(admin.ModelAdmin):
+    list_display = ('name', 'phone_key', 'email_key', 'appointments_count', 'created_at')
+    list_display_links = ('name',)
+    search_fields = ('name',)
+    readonly_fields = ('phone_key', 'email_key', 'created_at')
+    inlines = (PetInline, ClientAppointmentInline)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(appointments_total=Count('appointments'))
+
+    def get_search_results(self, request, queryset, search_term):
+        found = search_by_contact_key(queryset, search_term, 'phone_key', 'email_key')
+        if found is not None:
+            return found, False
+        return super().get_search_results(request, queryset, search_term)
+
+    @admin.display(description="Заявок", ordering='appointments_total')
+    def appointments_count(self, obj):
+        return obj.appointments_total
 
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
@@ -137,16 +231,16 @@ class AppointmentAdmin(admin.ModelAdmin):
     list_filter = ('status', 'service', 'created_at', 'desired_date')
     search_fields = ('client_name', 'phone', 'pet_name', 'service__name')
     list_editable = ('status',)
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'client', 'pet')
     date_hierarchy = 'created_at'
     raw_id_fields = ('service',)
     
     fieldsets = (
         ('Контактная информация', {
-            'fields': ('client_name', 'phone', 'email')
+            'fields': ('client_name', 'phone', 'email', 'client')
         }),
         ('Информация о питомце и услуге', {
-            'fields': ('pet_name', 'service', 'desired_date')
+            'fields': ('pet_name', 'pet', 'service', 'desired_date')
         }),
         ('Дополнительная информация', {
             'fields': ('message', 'status', 'created_at'),
@@ -154,6 +248,12 @@ class AppointmentAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        found = search_by_contact_key(queryset, search_term, 'phone_key', 'email_key')
+        if found is not None:
+            return found, False
+        return super().get_search_results(request, queryset, search_term)
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('author_name', 'doctor', 'rating', 'is_approved', 'short_text', 'created_at')
@@ -4,3 +4,29 @@ from django.apps import AppConfig
 class ClinicConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clinic'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete, m2m_changed
+        from .models import Promotion, Doctor, DoctorSpecialization, Specialization, Review, Service
+        from .catalog import price_index
+        from .promotions import invalidate_active_promotions
+        from .sections import invalidate_top_doctors
+
+        # Любое изменение акций сбрасывает кэш активных акций
+        post_save.connect(invalidate_active_promotions, sender=Promotion,
+                          dispatch_uid='clinic_promotion_saved')
+        post_delete.connect(invalidate_active_promotions, sender=Promotion,
+                            dispatch_uid='clinic_promotion_deleted')
+
+        # Топ врачей зависит от врачей, их специализаций и отзывов
+        for model in (Doctor, DoctorSpecialization, Specialization, Review):
+            post_save.connect(invalidate_top_doctors, sender=model,
+                              dispatch_uid=f'clinic_top_doctors_{model._meta.model_name}_saved')
+            post_delete.connect(invalidate_top_doctors, sender=model,
+                                dispatch_uid=f'clinic_top_doctors_{model._meta.model_name}_deleted')
+        m2m_changed.connect(invalidate_top_doctors, sender=Doctor.specializations.through,
+                            dispatch_uid='clinic_top_doctors_specializations_changed')
+
+        # Индекс цен каталога перестраивается после изменения услуг
+        post_save.connect(price_index.invalidate, sender=Service, dispatch_uid='clinic_price_index_saved')
+        post_delete.connect(price_index.invalidate, sender=Service, dispatch_uid='clinic_price_index_deleted')
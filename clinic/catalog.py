@@ -0,0 +1,70 @@
+import threading
+import time
+from bisect import bisect_left
+from decimal import Decimal
+
+from .models import Service
+
+# Диапазоны цен для бейджей в каталоге: (подпись, от, до); полуинтервалы [от, до)
+PRICE_RANGES = (
+    ("до 1 000 ₽", None, Decimal('1000')),
+    ("1 000 – 3 000 ₽", Decimal('1000'), Decimal('3000')),
+    ("3 000 – 5 000 ₽", Decimal('3000'), Decimal('5000')),
+    ("от 5 000 ₽", Decimal('5000'), None),
+)
+# Шаг цены (Service.price хранится с двумя знаками после запятой)
+PRICE_STEP = Decimal('0.01')
+
+
+class PriceIndex:
+    """Отсортированный в памяти список цен активных услуг.
+
+    Считает, сколько услуг попадает в диапазон цен, двоичным поиском - без запросов к БД.
+    Сбрасывается сигналами при изменении услуг; max_age ограничивает устаревание
+    в других процессах, куда сигналы не доходят.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._prices = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+
+    def _get_prices(self):
+        with self._lock:
+            if self._prices is None or time.monotonic() - self._built_at > self.max_age:
+                # Читается только индекс (is_active, price)
+                self._prices = sorted(
+                    Service.objects.filter(is_active=True).values_list('price', flat=True)
+                )
+                self._built_at = time.monotonic()
+            return self._prices
+
+    def count(self, min_price=None, max_price=None):
+        """Количество цен в полуинтервале [min_price, max_price)."""
+        prices = self._get_prices()
+        start = bisect_left(prices, min_price) if min_price is not None else 0
+        end = bisect_left(prices, max_price) if max_price is not None else len(prices)
+        return max(0, end - start)
+
+    def invalidate(self, **kwargs):
+        with self._lock:
+            self._prices = None
+
+
+price_index = PriceIndex()
+
+
+def price_facets():
+    """Бейджи диапазонов цен с количеством услуг (по всем активным услугам).
+
+    Фильтр каталога "Цена до" включительный, поэтому в ссылку идет верхняя граница
+    минус копейка. Ссылка сбрасывает фильтры по врачу и специализации (сортировка
+    сохраняется) - так она находит ровно столько услуг, сколько показывает бейдж.
+    """
+    return [
+        {'label': label, 'price_min': min_price,
+         'price_max': max_price - PRICE_STEP if max_price is not None else None,
+         'count': price_index.count(min_price, max_price)}
+        for label, min_price, max_price in PRICE_RANGES
+    ]
@@ -0,0 +1,27 @@
+import re
+
+# Нормализация контактов клиента: по этим ключам ищутся повторные обращения
+PHONE_CHARS_RE = re.compile(r'^[\d\s()+\-.]+$')
+NON_DIGITS_RE = re.compile(r'\D')
+PHONE_MIN_DIGITS = 10
+
+
+def normalize_phone(value):
+    """Приводит телефон к виду 7XXXXXXXXXX: '8 (912) 345-67-89' и '+7 912 3456789' дают один ключ."""
+    digits = NON_DIGITS_RE.sub('', value or '')
+    if len(digits) == 11 and digits.startswith('8'):
+        digits = '7' + digits[1:]
+    elif len(digits) == 10:
+        digits = '7' + digits
+    return digits
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+def normalize_name(value):
+    return ' '.join((value or '').split()).lower()
+
+def looks_like_phone(value):
+    """Похожа ли строка поиска на полный номер телефона (а не на часть номера или имя)."""
+    value = value.strip()
+    return bool(PHONE_CHARS_RE.match(value)) and len(NON_DIGITS_RE.sub('', value)) >= PHONE_MIN_DIGITS
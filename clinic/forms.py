@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 from .models import Doctor, Specialization
+from .photos import validate_image_upload, stage_upload, queue_doctor_photo
 
 class DoctorForm(forms.ModelForm):
     # Это поле уже есть в модели, но мы кастомизируем виджет для удобства
@@ -8,6 +10,14 @@ class DoctorForm(forms.ModelForm):
         widget=forms.CheckboxSelectMultiple,  # Показывать чекбоксы
         required=False  # Необязательное поле
     )
+    # Обычное файловое поле вместо ImageField: изображение не декодируется в запросе,
+    # формат проверяется по сигнатуре, а обработка идет в фоне (см. photos.py)
+    photo = forms.FileField(
+        label="Фотография",
+        required=False,
+        validators=[validate_image_upload],
+        widget=forms.ClearableFileInput(attrs={'accept': 'image/*'}),
+    )
 
     class Meta:
         model = Doctor
@@ -19,4 +29,63 @@ class DoctorForm(forms.ModelForm):
         }
         labels = {
             'is_featured': 'Показывать на главной',
-        }
\ No newline at end of file
+        }
+
+    def save(self, commit=True):
+        upload = self.cleaned_data.get('photo')
+        if not isinstance(upload, UploadedFile):
+            if upload is False:
+                # Фото удалили - результат незавершенной обработки больше не нужен
+                self.instance.photo_pending = ''
+            return super().save(commit)
+
+        # Новый врач получает заглушку, у существующего остается прежнее фото
+        self.instance.photo = self.initial.get('photo') or ''
+        if commit:
+            self.instance.photo_pending = stage_upload(upload)
+            doctor = super().save(commit)
+            queue_doctor_photo(doctor, doctor.photo_pending)
+            return doctor
+
+        # При commit=False файл в очередь ставит save_m2m(), который вызывающий
+        # код обязан вызвать после сохранения врача (как и для обычных M2M-полей)
+        doctor = super().save(commit)
+        save_m2m = self.save_m2m
+
+        def save_m2m_and_photo():
+            save_m2m()
+            doctor.photo_pending = stage_upload(upload)
+            Doctor.objects.filter(pk=doctor.pk).update(photo_pending=doctor.photo_pending)
+            queue_doctor_photo(doctor, doctor.photo_pending)
+
+        self.save_m2m = save_m2m_and_photo
+        return doctor
+
+class ServiceFilterForm(forms.Form):
+    # Фильтры и сортировка каталога услуг (GET-параметры)
+    SORT_CHOICES = [
+        ('name', 'По названию'),
+        ('price', 'Сначала дешевле'),
+        ('-price', 'Сначала дороже'),
+    ]
+
+    price_min = forms.DecimalField(label='Цена от', required=False, min_value=0, decimal_places=2,
+                                   widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '0'}))
+    price_max = forms.DecimalField(label='Цена до', required=False, min_value=0, decimal_places=2,
+                                   widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '∞'}))
+    doctor = forms.ModelChoiceField(
+        label='Врач',
+        queryset=Doctor.objects.order_by('last_name', 'first_name'),
+        required=False,
+        empty_label='Любой врач',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    specialization = forms.ModelChoiceField(
+        label='Специализация',
+        queryset=Specialization.objects.order_by('name'),
+        required=False,
+        empty_label='Любая специализация',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    sort = forms.ChoiceField(label='Сортировка', choices=SORT_CHOICES, required=False,
+                             widget=forms.Select(attrs={'class': 'form-select'}))
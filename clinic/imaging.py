@@ -0,0 +1,52 @@
+# Обработка изображений в отдельных процессах.
+# Модуль намеренно не импортирует Django: его загружают процессы пула.
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Сигнатуры форматов, которые принимаем от пользователей
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+def sniff_image_type(header):
+    """Определяет формат по первым байтам файла, не декодируя изображение."""
+    for signature, image_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_type
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+class ImageDecodeError(Exception):
+    """Файл не удалось прочитать как изображение - повторная обработка не поможет."""
+
+
+def _decode(source_path, max_side):
+    try:
+        with Image.open(source_path) as image:
+            # Для JPEG сразу декодируем в уменьшенном масштабе - это в разы дешевле
+            image.draft('RGB', (max_side, max_side))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            return image
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError) as exc:
+        # Битые и усеченные файлы Pillow сообщает в том числе обычным OSError
+        raise ImageDecodeError(f'{type(exc).__name__}: {exc}') from None
+
+def process_image(source_path, target_base, max_side, quality=85):
+    """Декодирует, поворачивает по EXIF, уменьшает и пересохраняет изображение без метаданных.
+
+    Расширение к target_base добавляется по итоговому формату; возвращается полный путь.
+    Если файл не декодируется, выбрасывает ImageDecodeError.
+    """
+    image = _decode(source_path, max_side)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        target_path = f'{target_base}.png'
+        image.save(target_path, 'PNG', optimize=True)
+    else:
+        target_path = f'{target_base}.jpg'
+        # EXIF и прочие метаданные не передаем - они отбрасываются при пересохранении
+        image.convert('RGB').save(target_path, 'JPEG', quality=quality, optimize=True)
+    return target_path
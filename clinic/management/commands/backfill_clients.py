@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from clinic.models import Appointment
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет нормализованные телефон/email и привязку к клиенту и питомцу у старых заявок. "
+        "Идет по первичному ключу порциями, каждая порция - в отдельной транзакции."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Сколько заявок обрабатывать за раз")
+        parser.add_argument('--pause', type=float, default=0.0, help="Пауза между порциями, секунд")
+
+    def handle(self, *args, **options):
+        fields = ['phone_key', 'email_key', 'client', 'pet']
+        last_pk = 0
+        processed = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Appointment.objects.filter(pk__gt=last_pk, client__isnull=True)
+                    .select_related('pet').order_by('pk')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                for appointment in batch:
+                    appointment.assign_client()
+                Appointment.objects.bulk_update(batch, fields)
+            last_pk = batch[-1].pk
+            processed += len(batch)
+            self.stdout.write(f"Обработано заявок: {processed}")
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"Готово, всего: {processed}"))
@@ -0,0 +1,37 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет истекшие сессии небольшими порциями. В отличие от clearsessions не держит "
+        "долгую блокировку на запись, поэтому не мешает приему заявок."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Сколько сессий удалять за раз")
+        parser.add_argument('--pause', type=float, default=0.1, help="Пауза между порциями, секунд")
+
+    def handle(self, *args, **options):
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(session_store, 'get_model_class'):
+            self.stdout.write("Сессии хранятся не в БД - очищать нечего.")
+            return
+
+        Session = session_store.get_model_class()
+        now = timezone.now()
+        deleted = 0
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"Удалено истекших сессий: {deleted}"))
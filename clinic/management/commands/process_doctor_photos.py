@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from clinic.models import Doctor
+from clinic.photos import pending_age, process_pending_photo
+
+
+class Command(BaseCommand):
+    help = "Обрабатывает фотографии врачей, оставшиеся в очереди (например, после перезапуска воркеров)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=600,
+            help="Брать только фото, ждущие дольше стольких секунд (более свежие еще обрабатывает пул)",
+        )
+
+    def handle(self, *args, **options):
+        pending = Doctor.objects.exclude(photo_pending='').values_list('pk', 'photo_pending')
+        processed = failed = 0
+        for doctor_pk, photo_pending in pending:
+            age = pending_age(photo_pending)
+            # Отсутствующий файл тоже обрабатываем: process_pending_photo снимет его с очереди
+            if age is not None and age < options['min_age']:
+                continue
+            try:
+                if process_pending_photo(doctor_pk, photo_pending):
+                    processed += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f"Врач {doctor_pk}: файл {photo_pending} не является изображением, снят с очереди")
+            except Exception as exc:
+                self.stderr.write(f"Врач {doctor_pk}: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Обработано фотографий: {processed}, отклонено: {failed}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from clinic.promotions import refresh_active_promotions
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает кэш активных акций. Запускайте по расписанию (cron) сразу после "
+        "полуночи, чтобы акции публиковались и снимались без пересчета в запросах."
+    )
+
+    def handle(self, *args, **options):
+        promotions = refresh_active_promotions()
+        self.stdout.write(self.style.SUCCESS(f"Активных акций: {len(promotions)}"))
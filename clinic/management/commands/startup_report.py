@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает, из чего складывается холодный старт воркера: время импорта модулей "
+        "и этапы django.setup() по приложениям. Замер идет в отдельном чистом процессе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help="Сколько самых медленных модулей показать")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'clinic.startup'],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "Замер не удался")
+        report = json.loads(result.stdout)
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Этапы запуска"))
+        for stage, seconds in report['stages'].items():
+            self.stdout.write(f"  {stage:<32} {seconds * 1000:8.1f} мс")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Приложения (create / models / ready)"))
+        for label, stages in report['apps'].items():
+            columns = " ".join(f"{stages.get(stage, 0) * 1000:8.1f}" for stage in ('create', 'models', 'ready'))
+            self.stdout.write(f"  {label:<32} {columns} мс")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Самые долгие импорты (суммарно, топ-{options['limit']})"))
+        for module, cumulative in self.parse_importtime(result.stderr)[:options['limit']]:
+            self.stdout.write(f"  {module:<48} {cumulative / 1000:8.1f} мс")
+
+    def parse_importtime(self, output):
+        # Строки вида "import time:       self [us] |  cumulative | imported package"
+        modules = []
+        for line in output.splitlines():
+            if not line.startswith('import time:') or 'imported package' in line:
+                continue
+            _, cumulative, module = line[len('import time:'):].split('|')
+            modules.append((module.strip(), int(cumulative)))
+        return sorted(modules, key=lambda item: item[1], reverse=True)
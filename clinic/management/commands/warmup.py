@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from clinic.startup import warm_up
+
+
+class Command(BaseCommand):
+    help = "Прогревает приложение: соединения с БД, шаблоны clinic/ и кэши секций главной страницы."
+
+    def handle(self, *args, **options):
+        for step, seconds in warm_up().items():
+            self.stdout.write(f"{step:<24} {seconds * 1000:8.1f} мс")
+        self.stdout.write(self.style.SUCCESS("Прогрев завершен"))
@@ -0,0 +1,15 @@
+class LazyAdminURLConfMiddleware:
+    """Для запросов к админке подключает полный URLconf вместо публичного.
+
+    Полный URLconf (и вместе с ним все admin.py) импортируется при первом таком запросе.
+    """
+    urlconf = 'config.urls'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # '/admin' без слэша тоже: полный URLconf отвечает на него редиректом на '/admin/'
+        if request.path_info == '/admin' or request.path_info.startswith('/admin/'):
+            request.urlconf = self.urlconf
+        return self.get_response(request)
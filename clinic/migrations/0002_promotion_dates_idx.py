@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0001_add_servicedoctor'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='promotion',
+            index=models.Index(fields=['start_date', 'end_date'], name='promotion_dates_idx'),
+        ),
+    ]
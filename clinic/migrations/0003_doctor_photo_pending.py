@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0002_promotion_dates_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='photo_pending',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Фото в обработке'),
+        ),
+    ]
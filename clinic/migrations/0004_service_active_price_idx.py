@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0003_doctor_photo_pending'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['is_active', 'price'], name='service_active_price_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0004_service_active_price_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Client',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Имя')),
+                ('phone_key', models.CharField(blank=True, db_index=True, max_length=20, verbose_name='Телефон (нормализованный)')),
+                ('email_key', models.CharField(blank=True, db_index=True, max_length=254, verbose_name='Email (нормализованный)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Клиент',
+                'verbose_name_plural': 'Клиенты',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='email_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='phone_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='client',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='clinic.client', verbose_name='Клиент'),
+        ),
+        migrations.CreateModel(
+            name='Pet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Кличка')),
+                ('name_key', models.CharField(editable=False, max_length=100)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pets', to='clinic.client', verbose_name='Клиент')),
+            ],
+            options={
+                'verbose_name': 'Питомец',
+                'verbose_name_plural': 'Питомцы',
+                'unique_together': {('client', 'name_key')},
+            },
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='pet',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='clinic.pet', verbose_name='Питомец'),
+        ),
+    ]
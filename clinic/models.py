@@ -1,4 +1,6 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from .contacts import normalize_phone, normalize_email, normalize_name
 
 # Модель для специализаций врачей (Справочник)
 class Specialization(models.Model):
@@ -23,6 +25,8 @@ class Doctor(models.Model):
     experience = models.PositiveIntegerField(verbose_name="Опыт работы (лет)")
     description = models.TextField(verbose_name="Информация о враче", blank=True)
     photo = models.ImageField(upload_to='doctors/', verbose_name="Фотография", blank=True)
+    # Исходник, который еще обрабатывается в фоне; пока он не готов, показывается заглушка
+    photo_pending = models.CharField(max_length=255, blank=True, editable=False, verbose_name="Фото в обработке")
     is_featured = models.BooleanField(default=False, verbose_name="Показывать на главной")
 
     class Meta:
@@ -63,6 +67,10 @@ class Service(models.Model):
     class Meta:
         verbose_name = "Услуга"
         verbose_name_plural = "Услуги"
+        # Индекс под каталог: только активные услуги с фильтром и сортировкой по цене
+        indexes = [
+            models.Index(fields=['is_active', 'price'], name='service_active_price_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -93,10 +101,90 @@ class Promotion(models.Model):
         verbose_name = "Акция"
         verbose_name_plural = "Акции"
         ordering = ['-start_date']
+        # Индекс под выборку активных акций (start_date <= сегодня <= end_date)
+        indexes = [
+            models.Index(fields=['start_date', 'end_date'], name='promotion_dates_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+# Модель для клиентов (объединяет заявки с одинаковым телефоном или email)
+class Client(models.Model):
+    name = models.CharField(max_length=100, verbose_name="Имя")
+    phone_key = models.CharField(max_length=20, blank=True, db_index=True, verbose_name="Телефон (нормализованный)")
+    email_key = models.CharField(max_length=254, blank=True, db_index=True, verbose_name="Email (нормализованный)")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+
+    class Meta:
+        verbose_name = "Клиент"
+        verbose_name_plural = "Клиенты"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.phone_key or self.email_key})"
+
+    @classmethod
+    def match(cls, phone_key, email_key, name):
+        """Находит клиента по телефону, затем по email; если не нашли - создает нового."""
+        if not phone_key and not email_key:
+            return None
+        client = None
+        if phone_key:
+            client = cls.objects.filter(phone_key=phone_key).first()
+        if client is None and email_key:
+            client = cls.objects.filter(email_key=email_key).first()
+        if client is None:
+            return cls.objects.create(name=name, phone_key=phone_key, email_key=email_key)
+
+        # Дополняем недостающий контакт, чтобы следующие заявки находились по любому из них
+        missing = {}
+        if phone_key and not client.phone_key:
+            missing['phone_key'] = phone_key
+        if email_key and not client.email_key:
+            missing['email_key'] = email_key
+        if missing:
+            for field, value in missing.items():
+                setattr(client, field, value)
+            client.save(update_fields=list(missing))
+        return client
+
+# Модель для питомцев клиента
+class Pet(models.Model):
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, verbose_name="Клиент", related_name='pets')
+    name = models.CharField(max_length=100, verbose_name="Кличка")
+    name_key = models.CharField(max_length=100, editable=False)
+
+    class Meta:
+        verbose_name = "Питомец"
+        verbose_name_plural = "Питомцы"
+        unique_together = ['client', 'name_key']
+
+    def __str__(self):
+        return self.name
+
+    def validate_unique(self, exclude=None):
+        super().validate_unique(exclude)
+        # name_key не редактируется в формах, поэтому unique_together по нему
+        # формы не проверяют - сверяем нормализованную кличку сами
+        if self.client_id is None or (exclude and 'name' in exclude):
+            return
+        duplicates = Pet.objects.filter(client_id=self.client_id, name_key=normalize_name(self.name))
+        if self.pk is not None:
+            duplicates = duplicates.exclude(pk=self.pk)
+        if duplicates.exists():
+            raise ValidationError({'name': "У клиента уже есть питомец с такой кличкой."})
+
+    def save(self, *args, **kwargs):
+        # Ключ клички считается при любом сохранении, в том числе из админки
+        self.name_key = normalize_name(self.name)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def match(cls, client, name):
+        pet, _ = cls.objects.get_or_create(client=client, name_key=normalize_name(name), defaults={'name': name})
+        return pet
+
 # Модель для заявок на запись
 class Appointment(models.Model):
     STATUS_NEW = 'new'
@@ -117,6 +205,13 @@ class Appointment(models.Model):
     message = models.TextField(verbose_name="Дополнительная информация", blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_NEW, verbose_name="Статус")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    # Нормализованные контакты для точного поиска по индексу (заполняются при сохранении)
+    phone_key = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+    email_key = models.CharField(max_length=254, blank=True, editable=False, db_index=True)
+    client = models.ForeignKey(Client, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+                               verbose_name="Клиент", related_name='appointments')
+    pet = models.ForeignKey(Pet, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+                            verbose_name="Питомец", related_name='appointments')
 
     class Meta:
         verbose_name = "Заявка на запись"
@@ -126,6 +221,25 @@ class Appointment(models.Model):
     def __str__(self):
         return f"Заявка от {self.client_name} ({self.service})"
 
+    def assign_client(self):
+        """Пересчитывает ключи контактов и привязывает заявку к клиенту и питомцу."""
+        phone_key, email_key = normalize_phone(self.phone), normalize_email(self.email)
+        # Клиента ищем заново только для новой заявки или при смене контактов
+        if self.client_id is None or (phone_key, email_key) != (self.phone_key, self.email_key):
+            self.phone_key, self.email_key = phone_key, email_key
+            self.client = Client.match(phone_key, email_key, self.client_name)
+            self.pet = None
+        if self.client is None:
+            self.pet = None
+        elif self.pet is None or self.pet.name_key != normalize_name(self.pet_name):
+            self.pet = Pet.match(self.client, self.pet_name)
+
+    def save(self, *args, **kwargs):
+        # Частичное сохранение (например, только статуса) контакты не меняет
+        if kwargs.get('update_fields') is None:
+            self.assign_client()
+        super().save(*args, **kwargs)
+
 # Модель для отзывов
 class Review(models.Model):
     author_name = models.CharField(max_length=100, verbose_name="Имя автора")
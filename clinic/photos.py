@@ -0,0 +1,159 @@
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .imaging import ImageDecodeError, process_image, sniff_image_type
+from .models import Doctor
+from .sections import invalidate_top_doctors
+
+logger = logging.getLogger(__name__)
+
+INCOMING_DIR = 'doctors/incoming/'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def validate_image_upload(upload):
+    """Дешевая проверка загрузки: размер и сигнатура файла, без декодирования."""
+    max_size = settings.DOCTOR_PHOTO_MAX_UPLOAD_SIZE
+    if upload.size > max_size:
+        raise ValidationError(f"Файл слишком большой (максимум {max_size // (1024 * 1024)} МБ).")
+    upload.seek(0)
+    header = upload.read(16)
+    upload.seek(0)
+    if sniff_image_type(header) is None:
+        raise ValidationError("Загрузите изображение в формате JPEG, PNG, GIF или WebP.")
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: процессы пула не наследуют состояние Django и соединения с БД
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PHOTO_PROCESSING_WORKERS,
+                mp_context=get_context('spawn'),
+            )
+        return _executor
+
+
+def _reset_executor(broken):
+    # Если процесс пула погиб (например, его убил OOM), пул больше не принимает задачи
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def stage_upload(upload):
+    """Сохраняет исходный файл во временный каталог; для временных файлов это перемещение."""
+    return default_storage.save(INCOMING_DIR + os.path.basename(upload.name), upload)
+
+
+def _target_base(pending, suffix='processed'):
+    return f'{os.path.splitext(default_storage.path(pending))[0]}.{suffix}'
+
+
+def pending_age(pending):
+    """Сколько секунд исходник ждет обработки; None, если файла уже нет."""
+    try:
+        staged_at = default_storage.get_modified_time(pending)
+    except FileNotFoundError:
+        return None
+    return (timezone.now() - staged_at).total_seconds()
+
+
+def finish_photo(doctor_pk, pending, processed_path):
+    """Переносит готовое фото в doctors/ и подменяет им заглушку у врача."""
+    stem = os.path.splitext(os.path.basename(pending))[0]
+    extension = os.path.splitext(processed_path)[1]
+    with open(processed_path, 'rb') as processed:
+        name = default_storage.save(f'doctors/{stem}{extension}', File(processed))
+    os.remove(processed_path)
+    default_storage.delete(pending)
+
+    # Если за время обработки загрузили другое фото, этот результат уже не нужен
+    updated = Doctor.objects.filter(pk=doctor_pk, photo_pending=pending).update(photo=name, photo_pending='')
+    if not updated:
+        default_storage.delete(name)
+        return
+    # update() не отправляет сигналы, поэтому кэш карточек сбрасываем сами
+    invalidate_top_doctors()
+
+
+def fail_photo(doctor_pk, pending, error):
+    """Окончательная ошибка: файл не изображение. Убираем его из очереди, врачу остается прежнее фото."""
+    logger.error("Фото врача %s (%s) не удалось декодировать: %s", doctor_pk, pending, error)
+    Doctor.objects.filter(pk=doctor_pk, photo_pending=pending).update(photo_pending='')
+    default_storage.delete(pending)
+
+
+def process_pending_photo(doctor_pk, pending):
+    """Синхронная обработка - для команды process_doctor_photos. Возвращает True, если фото готово."""
+    try:
+        # Свой путь результата: даже при гонке с пулом файлы не перезапишут друг друга
+        processed_path = process_image(default_storage.path(pending), _target_base(pending, 'retry'),
+                                       settings.DOCTOR_PHOTO_MAX_SIDE)
+    except ImageDecodeError as exc:
+        fail_photo(doctor_pk, pending, exc)
+        return False
+    finish_photo(doctor_pk, pending, processed_path)
+    return True
+
+
+def _on_processed(executor, doctor_pk, pending, future):
+    try:
+        processed_path = future.result()
+    except ImageDecodeError as exc:
+        fail_photo(doctor_pk, pending, exc)
+    except BrokenProcessPool:
+        _reset_executor(executor)
+        # Файл остается в incoming/, его подберет команда process_doctor_photos
+        logger.exception("Пул обработки фото упал на фото врача %s (%s)", doctor_pk, pending)
+    except Exception:
+        logger.exception("Не удалось обработать фото врача %s (%s)", doctor_pk, pending)
+    else:
+        try:
+            finish_photo(doctor_pk, pending, processed_path)
+        except Exception:
+            logger.exception("Не удалось сохранить фото врача %s (%s)", doctor_pk, pending)
+    finally:
+        close_old_connections()
+
+
+def _submit(executor, doctor_pk, pending):
+    future = executor.submit(
+        process_image, default_storage.path(pending), _target_base(pending), settings.DOCTOR_PHOTO_MAX_SIDE
+    )
+    future.add_done_callback(lambda f: _on_processed(executor, doctor_pk, pending, f))
+
+
+def schedule_photo_processing(doctor_pk, pending):
+    # Ошибки постановки в очередь не должны ронять запрос: врач уже сохранен,
+    # а необработанное фото подберет команда process_doctor_photos
+    try:
+        executor = _get_executor()
+        try:
+            _submit(executor, doctor_pk, pending)
+        except BrokenProcessPool:
+            _reset_executor(executor)
+            _submit(_get_executor(), doctor_pk, pending)
+    except Exception:
+        logger.exception("Не удалось поставить в очередь фото врача %s (%s)", doctor_pk, pending)
+
+
+def queue_doctor_photo(doctor, pending):
+    # Отдаем в пул только после фиксации транзакции, когда запись врача уже видна
+    transaction.on_commit(lambda: schedule_photo_processing(doctor.pk, pending))
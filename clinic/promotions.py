@@ -0,0 +1,58 @@
+import math
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import Promotion
+
+ACTIVE_PROMOTIONS_CACHE_KEY = 'clinic:active_promotions'
+
+
+# Условия статусов акции на дату (проверяются в SQL, а не в Python)
+def active_q(day):
+    return Q(start_date__lte=day, end_date__gte=day)
+
+def upcoming_q(day):
+    return Q(start_date__gt=day)
+
+def expired_q(day):
+    return Q(end_date__lt=day)
+
+
+def _seconds_until(day):
+    # Сколько секунд осталось до полуночи указанного дня (локальное время)
+    boundary = timezone.make_aware(datetime.combine(day, time.min))
+    return max(1, math.ceil((boundary - timezone.now()).total_seconds()))
+
+def _next_boundary(today, promotions):
+    # Ближайший момент, когда набор активных акций изменится:
+    # начало следующей акции или день после окончания одной из текущих
+    candidates = [p.end_date + timedelta(days=1) for p in promotions]
+    next_start = Promotion.objects.filter(upcoming_q(today)).aggregate(
+        next_start=Min('start_date')
+    )['next_start']
+    if next_start:
+        candidates.append(next_start)
+    return min(candidates) if candidates else None
+
+def refresh_active_promotions():
+    """Пересчитывает набор активных акций и кладет его в кэш до следующей границы."""
+    today = timezone.localdate()
+    promotions = list(Promotion.objects.filter(active_q(today)).order_by('-start_date'))
+    boundary = _next_boundary(today, promotions)
+    # Без текущих и предстоящих акций границы нет - тогда пересчитываем набор
+    # на следующий день, на случай если сброс сигналом не дошел
+    timeout = _seconds_until(boundary or today + timedelta(days=1))
+    cache.set(ACTIVE_PROMOTIONS_CACHE_KEY, promotions, timeout)
+    return promotions
+
+def get_active_promotions():
+    promotions = cache.get(ACTIVE_PROMOTIONS_CACHE_KEY)
+    if promotions is None:
+        promotions = refresh_active_promotions()
+    return promotions
+
+def invalidate_active_promotions(**kwargs):
+    cache.delete(ACTIVE_PROMOTIONS_CACHE_KEY)
@@ -0,0 +1,35 @@
+from django.core.cache import cache
+from django.db.models import Avg, Count
+
+from .models import Doctor
+
+TOP_DOCTORS_CACHE_KEY = 'clinic:top_doctors'
+TOP_DOCTORS_LIMIT = 3
+# Страховка на случай изменений в обход сигналов (например, queryset.update())
+TOP_DOCTORS_CACHE_TIMEOUT = 10 * 60
+
+
+# Секции главной страницы, которые дорого считать на каждый запрос
+def refresh_top_doctors():
+    """Пересчитывает топ врачей по отзывам (агрегация Avg) и кладет результат в кэш."""
+    doctors = list(
+        Doctor.objects.annotate(
+            avg_rating=Avg('reviews__rating'),
+            reviews_count=Count('reviews')
+        ).filter(
+            avg_rating__isnull=False,
+            reviews_count__gte=1
+        ).prefetch_related('specializations').order_by('-avg_rating')[:TOP_DOCTORS_LIMIT]
+    )
+    # Сбрасывается сигналами при изменении врачей и отзывов (кэш общий для всех воркеров)
+    cache.set(TOP_DOCTORS_CACHE_KEY, doctors, TOP_DOCTORS_CACHE_TIMEOUT)
+    return doctors
+
+def get_top_doctors():
+    doctors = cache.get(TOP_DOCTORS_CACHE_KEY)
+    if doctors is None:
+        doctors = refresh_top_doctors()
+    return doctors
+
+def invalidate_top_doctors(**kwargs):
+    cache.delete(TOP_DOCTORS_CACHE_KEY)
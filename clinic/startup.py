@@ -0,0 +1,129 @@
+# Прогрев и профилирование запуска воркера.
+# Модуль импортируется до django.setup(), поэтому Django-модели подключаются внутри функций.
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+def compile_templates():
+    """Компилирует все шаблоны clinic/templates/clinic, чтобы они попали в кэш загрузчика."""
+    from django.apps import apps
+    from django.template.loader import get_template
+
+    templates_dir = os.path.join(apps.get_app_config('clinic').path, 'templates', 'clinic')
+    names = sorted(
+        f'clinic/{name}' for name in os.listdir(templates_dir) if name.endswith('.html')
+    )
+    for name in names:
+        get_template(name)
+    return names
+
+def open_connections():
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.ensure_connection()
+    return [connection.alias for connection in connections.all()]
+
+def prime_index_sections():
+    from .promotions import refresh_active_promotions
+    from .sections import refresh_top_doctors
+
+    refresh_active_promotions()
+    refresh_top_doctors()
+
+def warm_up():
+    """Готовит воркер к первому запросу; возвращает длительность каждого шага в секундах."""
+    timings = {}
+    for step in (open_connections, compile_templates, prime_index_sections):
+        started = time.perf_counter()
+        step()
+        timings[step.__name__] = time.perf_counter() - started
+    return timings
+
+def close_connections_before_fork():
+    # С gunicorn --preload прогрев идет в мастер-процессе: его соединения
+    # не должны достаться воркерам, поэтому закрываем их перед fork()
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+
+def open_connections_after_fork():
+    try:
+        open_connections()
+    except Exception:
+        logger.exception("Воркер не смог открыть соединение с БД при старте")
+
+def warm_up_safely():
+    # Ошибка прогрева (например, до применения миграций) не должна мешать старту воркера
+    try:
+        timings = warm_up()
+    except Exception:
+        logger.exception("Прогрев воркера не выполнен")
+        return
+    logger.info("Прогрев воркера: %s", ", ".join(f"{step} {seconds:.3f} с" for step, seconds in timings.items()))
+
+
+def profile_startup():
+    """Замеряет этапы django.setup() по приложениям и загрузку WSGI-обработчика.
+
+    Запускается в отдельном процессе (команда startup_report), иначе все уже импортировано.
+    """
+    from django.apps.config import AppConfig
+
+    apps_timings = defaultdict(dict)
+    create = AppConfig.create.__func__
+
+    def timed(label, stage, func):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                apps_timings[label][stage] = time.perf_counter() - started
+        return wrapper
+
+    def timed_create(cls, entry):
+        started = time.perf_counter()
+        app_config = create(cls, entry)
+        apps_timings[app_config.label]['create'] = time.perf_counter() - started
+        app_config.import_models = timed(app_config.label, 'models', app_config.import_models)
+        app_config.ready = timed(app_config.label, 'ready', app_config.ready)
+        return app_config
+
+    AppConfig.create = classmethod(timed_create)
+
+    stages = {}
+    started = time.perf_counter()
+    import django
+    from django.conf import settings
+    settings.INSTALLED_APPS  # Загрузка модуля настроек
+    stages['settings'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    django.setup(set_prefix=False)
+    stages['django.setup'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    from django.core.handlers.wsgi import WSGIHandler
+    WSGIHandler()  # Загрузка middleware
+    stages['middleware'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    from django.urls import get_resolver
+    get_resolver().url_patterns  # Импорт корневого URLconf
+    stages['urlconf'] = time.perf_counter() - started
+
+    return {'stages': stages, 'apps': dict(apps_timings)}
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    json.dump(profile_startup(), sys.stdout)
@@ -1,3 +1,434 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .catalog import PriceIndex, price_facets, price_index
+from .forms import DoctorForm
+from .middleware import LazyAdminURLConfMiddleware
+from .contacts import looks_like_phone, normalize_email, normalize_phone
+from .models import Appointment, Client, Doctor, Pet, Promotion, Service
+from .photos import fail_photo, finish_photo, process_pending_photo, validate_image_upload
+from .promotions import _next_boundary, get_active_promotions, refresh_active_promotions
+from .startup import close_connections_before_fork, compile_templates, warm_up
+
+
+# Тесты не трогают общий кэш приложения
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_promotion(title, start_date, end_date):
+    return Promotion.objects.create(title=title, text='Текст', start_date=start_date, end_date=end_date)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PromotionScheduleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+
+    def test_boundary_is_day_after_current_promotion_ends(self):
+        current = create_promotion('Текущая', self.today - timedelta(days=3), self.today + timedelta(days=2))
+        self.assertEqual(_next_boundary(self.today, [current]), self.today + timedelta(days=3))
+
+    def test_boundary_is_start_of_upcoming_promotion_if_earlier(self):
+        current = create_promotion('Текущая', self.today, self.today + timedelta(days=10))
+        create_promotion('Будущая', self.today + timedelta(days=4), self.today + timedelta(days=20))
+        self.assertEqual(_next_boundary(self.today, [current]), self.today + timedelta(days=4))
+
+    def test_no_boundary_without_current_and_upcoming_promotions(self):
+        create_promotion('Прошедшая', self.today - timedelta(days=10), self.today - timedelta(days=1))
+        self.assertIsNone(_next_boundary(self.today, []))
+
+    def test_cache_expires_at_next_boundary(self):
+        create_promotion('Текущая', self.today, self.today + timedelta(days=5))
+        with mock.patch('clinic.promotions._seconds_until', return_value=60) as seconds_until:
+            refresh_active_promotions()
+        seconds_until.assert_called_once_with(self.today + timedelta(days=6))
+
+    def test_cache_without_boundary_expires_next_day(self):
+        with mock.patch('clinic.promotions._seconds_until', return_value=60) as seconds_until:
+            refresh_active_promotions()
+        seconds_until.assert_called_once_with(self.today + timedelta(days=1))
+
+    def test_saving_promotion_resets_cached_set(self):
+        self.assertEqual(get_active_promotions(), [])
+        promotion = create_promotion('Новая', self.today, self.today)
+        self.assertEqual(get_active_promotions(), [promotion])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PriceIndexTests(TestCase):
+    def setUp(self):
+        for price in ('500', '1000', '3000', '5000'):
+            Service.objects.create(name=f'Услуга {price}', description='Описание', price=Decimal(price))
+        Service.objects.create(name='Неактивная', description='Описание', price=Decimal('2000'), is_active=False)
+        price_index.invalidate()
+
+    def test_count_uses_half_open_ranges(self):
+        index = PriceIndex()
+        self.assertEqual(index.count(), 4)
+        self.assertEqual(index.count(None, Decimal('1000')), 1)
+        self.assertEqual(index.count(Decimal('1000'), Decimal('3000')), 1)
+        self.assertEqual(index.count(Decimal('5000'), None), 1)
+        self.assertEqual(index.count(Decimal('6000'), None), 0)
+
+    def test_facets_do_not_count_boundary_prices_twice(self):
+        self.assertEqual([facet['count'] for facet in price_facets()], [1, 1, 1, 1])
+
+    def test_facet_links_match_badge_counts(self):
+        for facet in price_facets():
+            params = {key: facet[key] for key in ('price_min', 'price_max') if facet[key] is not None}
+            response = self.client.get(reverse('clinic:service_catalog'), params)
+            self.assertEqual(response.context['results_count'], facet['count'])
+
+    def test_facet_links_reset_doctor_filter(self):
+        doctor = Doctor.objects.create(first_name='Анна', last_name='Иванова', experience=5)
+        Service.objects.get(price=Decimal('500')).doctors.add(doctor)
+        response = self.client.get(reverse('clinic:service_catalog'), {'doctor': doctor.pk, 'sort': 'price'})
+        self.assertContains(response, '?sort=price&amp;price_max=999.99"')
+        self.assertNotContains(response, f'doctor={doctor.pk}&amp;price')
+
+    def test_invalid_field_keeps_other_filters(self):
+        doctor = Doctor.objects.create(first_name='Анна', last_name='Иванова', experience=5)
+        Service.objects.get(price=Decimal('500')).doctors.add(doctor)
+        response = self.client.get(reverse('clinic:service_catalog'), {'price_min': 'abc', 'doctor': doctor.pk})
+        self.assertEqual([service.price for service in response.context['services']], [Decimal('500')])
+        self.assertIn('price_min', response.context['form'].errors)
+
+    def test_index_is_rebuilt_after_service_change(self):
+        Service.objects.create(name='Новая', description='Описание', price=Decimal('700'))
+        self.assertEqual(price_index.count(None, Decimal('1000')), 2)
+
+
+class ContactNormalizationTests(TestCase):
+    def test_phone_formats_share_one_key(self):
+        for phone in ('8 (912) 345-67-89', '+7 912 345 67 89', '9123456789', '7-912-345-67-89'):
+            self.assertEqual(normalize_phone(phone), '79123456789')
+
+    def test_short_and_foreign_numbers_keep_their_digits(self):
+        self.assertEqual(normalize_phone('345-67'), '34567')
+        self.assertEqual(normalize_phone('+44 20 7946 0958'), '442079460958')
+        self.assertEqual(normalize_phone(''), '')
+
+    def test_email_is_trimmed_and_lowercased(self):
+        self.assertEqual(normalize_email('  Ivan@Mail.RU '), 'ivan@mail.ru')
+
+    def test_looks_like_phone(self):
+        self.assertTrue(looks_like_phone('8 (912) 345-67-89'))
+        self.assertTrue(looks_like_phone('+79123456789'))
+        self.assertFalse(looks_like_phone('345-67'))
+        self.assertFalse(looks_like_phone('Иван 89123456789'))
+
+
+class ClientGroupingTests(TestCase):
+    def setUp(self):
+        self.service = Service.objects.create(name='Осмотр', description='Описание', price=Decimal('1000'))
+
+    def create_appointment(self, **fields):
+        fields.setdefault('client_name', 'Иван')
+        fields.setdefault('pet_name', 'Мурка')
+        return Appointment.objects.create(service=self.service, desired_date=timezone.localdate(), **fields)
+
+    def test_phone_variants_are_grouped_into_one_client_and_pet(self):
+        first = self.create_appointment(phone='8 (912) 345-67-89')
+        second = self.create_appointment(phone='+7 912 345 67 89', pet_name=' мурка ')
+        self.assertEqual(first.client, second.client)
+        self.assertEqual(first.pet, second.pet)
+        self.assertEqual(Client.objects.count(), 1)
+        self.assertEqual(Pet.objects.count(), 1)
+
+    def test_client_is_found_by_email_and_gets_missing_phone(self):
+        first = self.create_appointment(phone='', email='Ivan@mail.ru')
+        second = self.create_appointment(phone='89123456789', email='ivan@mail.ru ')
+        self.assertEqual(first.client, second.client)
+        second.client.refresh_from_db()
+        self.assertEqual(second.client.phone_key, '79123456789')
+
+    def test_changed_phone_moves_appointment_to_another_client(self):
+        appointment = self.create_appointment(phone='89123456789')
+        other = self.create_appointment(phone='89000000000')
+        appointment.phone = '8 900 000-00-00'
+        appointment.save()
+        self.assertEqual(appointment.client, other.client)
+
+    def test_pets_added_in_admin_get_name_key(self):
+        client = Client.objects.create(name='Иван', phone_key='79123456789')
+        murka = Pet.objects.create(client=client, name='Мурка')
+        Pet.objects.create(client=client, name='Барсик')
+        self.assertEqual(murka.name_key, 'мурка')
+        appointment = self.create_appointment(phone='89123456789', pet_name='мурка')
+        self.assertEqual(appointment.pet, murka)
+
+    def test_backfill_links_existing_appointments(self):
+        for phone in ('89123456789', '+7 912 345-67-89', '89000000000'):
+            self.create_appointment(phone=phone)
+        Appointment.objects.update(client=None, pet=None, phone_key='', email_key='')
+        Client.objects.all().delete()
+
+        call_command('backfill_clients', batch_size=2, stdout=StringIO())
+
+        self.assertFalse(Appointment.objects.filter(client__isnull=True).exists())
+        self.assertEqual(Client.objects.count(), 2)
+        self.assertEqual(
+            Appointment.objects.filter(phone_key='79123456789').values('client').distinct().count(), 1
+        )
+
+
+def jpeg_bytes(size=(2000, 1500)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class PetNameUniquenessTests(TestCase):
+    def setUp(self):
+        self.owner = Client.objects.create(name='Иван', phone_key='79123456789')
+        Pet.objects.create(client=self.owner, name='Мурка')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def post_pets(self, *names, initial=1):
+        data = {
+            'name': self.owner.name, 'phone_key': self.owner.phone_key, 'email_key': '',
+            'pets-TOTAL_FORMS': len(names) + initial, 'pets-INITIAL_FORMS': initial,
+            'appointments-TOTAL_FORMS': 0, 'appointments-INITIAL_FORMS': 0,
+        }
+        for number, pet in enumerate(self.owner.pets.order_by('pk')[:initial]):
+            data.update({f'pets-{number}-id': pet.pk, f'pets-{number}-client': self.owner.pk, f'pets-{number}-name': pet.name})
+        for number, name in enumerate(names, start=initial):
+            data.update({f'pets-{number}-client': self.owner.pk, f'pets-{number}-name': name})
+        return self.client.post(reverse('admin:clinic_client_change', args=[self.owner.pk]), data)
+
+    def test_model_validation_compares_normalized_names(self):
+        with self.assertRaises(ValidationError) as raised:
+            Pet(client=self.owner, name='  мурка ').full_clean()
+        self.assertIn('name', raised.exception.message_dict)
+        Pet.objects.get().full_clean()  # Сам с собой не конфликтует
+
+    def test_admin_inline_shows_error_for_existing_pet(self):
+        response = self.post_pets('мурка')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'У клиента уже есть питомец с такой кличкой.')
+        self.assertEqual(Pet.objects.count(), 1)
+
+    def test_admin_inline_shows_error_for_duplicates_in_one_form(self):
+        response = self.post_pets('Барсик', ' барсик')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Питомец с такой кличкой уже есть в списке.')
+        self.assertEqual(Pet.objects.count(), 1)
+
+    def test_admin_inline_saves_new_pet(self):
+        self.assertEqual(self.post_pets('Барсик').status_code, 302)
+        self.assertEqual(self.owner.pets.get(name='Барсик').name_key, 'барсик')
+
+
+class PhotoProcessingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, CACHES=TEST_CACHES, DOCTOR_PHOTO_MAX_SIDE=400)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def form_data(self):
+        return {'first_name': 'Анна', 'last_name': 'Иванова', 'experience': 5}
+
+    def upload(self, name='photo.jpg', content=None):
+        return SimpleUploadedFile(name, content if content is not None else jpeg_bytes(), content_type='image/jpeg')
+
+    def stage(self, doctor, content=None, name='photo.jpg'):
+        pending = default_storage.save(f'doctors/incoming/{name}', ContentFile(content or jpeg_bytes()))
+        Doctor.objects.filter(pk=doctor.pk).update(photo_pending=pending)
+        return pending
+
+    def test_validate_image_upload_checks_signature_and_size(self):
+        validate_image_upload(self.upload())
+        with self.assertRaises(ValidationError):
+            validate_image_upload(self.upload('photo.jpg', b'not an image at all'))
+        with override_settings(DOCTOR_PHOTO_MAX_UPLOAD_SIZE=10):
+            with self.assertRaises(ValidationError):
+                validate_image_upload(self.upload())
+
+    def test_new_doctor_gets_placeholder_until_photo_is_processed(self):
+        form = DoctorForm(self.form_data(), {'photo': self.upload()})
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.captureOnCommitCallbacks() as callbacks:
+            doctor = form.save()
+        self.assertEqual(len(callbacks), 1)
+        doctor.refresh_from_db()
+        self.assertFalse(doctor.photo)
+        self.assertTrue(doctor.photo_pending.startswith('doctors/incoming/'))
+
+    def test_updated_doctor_keeps_previous_photo(self):
+        doctor = Doctor.objects.create(first_name='Анна', last_name='Иванова', experience=5, photo='doctors/old.jpg')
+        form = DoctorForm(self.form_data(), {'photo': self.upload()}, instance=doctor)
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.captureOnCommitCallbacks():
+            form.save()
+        doctor.refresh_from_db()
+        self.assertEqual(doctor.photo.name, 'doctors/old.jpg')
+        self.assertNotEqual(doctor.photo_pending, '')
+
+    def test_save_without_commit_queues_photo_in_save_m2m(self):
+        form = DoctorForm(self.form_data(), {'photo': self.upload()})
+        self.assertTrue(form.is_valid(), form.errors)
+        doctor = form.save(commit=False)
+        self.assertEqual(doctor.photo_pending, '')
+        self.assertFalse(default_storage.exists('doctors/incoming/photo.jpg'))
+        doctor.save()
+        with self.captureOnCommitCallbacks() as callbacks:
+            form.save_m2m()
+        self.assertEqual(len(callbacks), 1)
+        doctor.refresh_from_db()
+        self.assertTrue(default_storage.exists(doctor.photo_pending))
+
+    def test_process_pending_photo_replaces_placeholder(self):
+        doctor = Doctor.objects.create(first_name='Анна', last_name='Иванова', experience=5)
+        pending = self.stage(doctor)
+        self.assertTrue(process_pending_photo(doctor.pk, pending))
+        doctor.refresh_from_db()
+        self.assertEqual(doctor.photo_pending, '')
+        self.assertFalse(default_storage.exists(pending))
+        with Image.open(doctor.photo.path) as image:
+            self.assertEqual(image.size, (400, 300))
+
+    def test_undecodable_photo_is_removed_from_queue(self):
+        doctor = Doctor.objects.create(first_name='Анна', last_name='Иванова', experience=5)
+        pending = self.stage(doctor, content=b'\xff\xd8\xff\xe0' + b'garbage' * 10, name='bad.jpg')
+        with self.assertLogs('clinic.photos', 'ERROR'):
+            self.assertFalse(process_pending_photo(doctor.pk, pending))
+        doctor.refresh_from_db()
+        self.assertEqual(doctor.photo_pending, '')
+        self.assertFalse(doctor.photo)
+        self.assertFalse(default_storage.exists(pending))
+
+    def test_results_for_replaced_upload_are_discarded(self):
+        doctor = Doctor.objects.create(first_name='Анна', last_name='Иванова', experience=5)
+        stale = self.stage(doctor, name='stale.jpg')
+        newer = self.stage(doctor, name='newer.jpg')
+
+        processed_path = os.path.join(tempfile.mkdtemp(dir=default_storage.location), 'stale.jpg')
+        with open(processed_path, 'wb') as processed:
+            processed.write(jpeg_bytes((10, 10)))
+        finish_photo(doctor.pk, stale, processed_path)
+        with self.assertLogs('clinic.photos', 'ERROR'):
+            fail_photo(doctor.pk, stale, 'ошибка')
+
+        doctor.refresh_from_db()
+        self.assertFalse(doctor.photo)
+        self.assertEqual(doctor.photo_pending, newer)
+        self.assertFalse(default_storage.exists('doctors/stale.jpg'))
+
+    def test_command_skips_photos_the_pool_may_still_process(self):
+        doctor = Doctor.objects.create(first_name='Анна', last_name='Иванова', experience=5)
+        pending = self.stage(doctor)
+
+        call_command('process_doctor_photos', stdout=StringIO())
+        doctor.refresh_from_db()
+        self.assertEqual(doctor.photo_pending, pending)
+
+        call_command('process_doctor_photos', min_age=0, stdout=StringIO())
+        doctor.refresh_from_db()
+        self.assertEqual(doctor.photo_pending, '')
+        self.assertTrue(doctor.photo)
+
+
+class LazyAdminTests(TestCase):
+    def test_middleware_switches_urlconf_only_for_admin(self):
+        middleware = LazyAdminURLConfMiddleware(lambda request: request)
+        factory = RequestFactory()
+        for path in ('/admin', '/admin/', '/admin/clinic/doctor/'):
+            self.assertEqual(getattr(middleware(factory.get(path)), 'urlconf', None), 'config.urls')
+        for path in ('/', '/administrator/', '/services/'):
+            self.assertIsNone(getattr(middleware(factory.get(path)), 'urlconf', None))
+
+    @override_settings(ROOT_URLCONF='config.public_urls')
+    def test_public_urlconf_has_no_admin(self):
+        self.assertEqual(self.client.get('/admin/').status_code, 404)
+
+    def test_admin_is_reachable_in_lazy_mode(self):
+        middleware = ['clinic.middleware.LazyAdminURLConfMiddleware'] + list(settings.MIDDLEWARE)
+        with override_settings(ROOT_URLCONF='config.public_urls', MIDDLEWARE=middleware):
+            self.assertRedirects(self.client.get('/admin'), '/admin/', status_code=301, target_status_code=302)
+            self.assertEqual(self.client.get('/admin/').status_code, 302)
+            self.assertEqual(self.client.get('/').status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class WarmUpTests(TestCase):
+    def test_compile_templates_covers_every_clinic_template(self):
+        names = compile_templates()
+        self.assertIn('clinic/index.html', names)
+        self.assertIn('clinic/service_catalog.html', names)
+        self.assertEqual(len(names), len([name for name in os.listdir(
+            os.path.join(os.path.dirname(__file__), 'templates', 'clinic')) if name.endswith('.html')]))
+
+    def test_warm_up_primes_index_sections(self):
+        cache.clear()
+        timings = warm_up()
+        self.assertEqual(list(timings), ['open_connections', 'compile_templates', 'prime_index_sections'])
+        self.assertIsNotNone(cache.get('clinic:active_promotions'))
+        self.assertIsNotNone(cache.get('clinic:top_doctors'))
+
+    def test_connections_are_kept_inside_transaction_before_fork(self):
+        # TestCase держит открытую транзакцию - закрывать такое соединение нельзя
+        connection.ensure_connection()
+        close_connections_before_fork()
+        self.assertIsNotNone(connection.connection)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AnonymousSessionTests(TestCase):
+    def setUp(self):
+        Doctor.objects.create(first_name='Анна', last_name='Иванова', experience=5)
+
+    def test_public_pages_do_not_create_session(self):
+        for url in ('/', '/services/', '/search/?q=осмотр', '/doctors/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies, url)
+        self.assertFalse(Session.objects.exists())
+
+    def test_cacheable_pages_do_not_vary_on_cookie(self):
+        # Список врачей содержит формы с CSRF-токеном, поэтому здесь не проверяется
+        for url in ('/', '/services/', '/search/?q=осмотр'):
+            self.assertNotIn('Vary', self.client.get(url).headers, url)
+
+    def test_messages_are_kept_in_cookie(self):
+        doctor = Doctor.objects.get()
+        response = self.client.post(f'/doctor/{doctor.pk}/delete/')
+        self.assertIn('messages', response.cookies)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertFalse(Session.objects.exists())
+
+
+class ClearExpiredSessionsTests(TestCase):
+    def test_expired_sessions_are_deleted_in_batches(self):
+        now = timezone.now()
+        for number in range(3):
+            Session.objects.create(session_key=f'expired{number}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=now + timedelta(days=1))
+
+        out = StringIO()
+        call_command('clear_expired_sessions', batch_size=1, pause=0, stdout=out)
+
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+        self.assertIn('3', out.getvalue())
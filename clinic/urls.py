@@ -6,6 +6,7 @@ app_name = 'clinic'
 urlpatterns = [
     path('', views.index, name='index'),
     path('search/', views.search_services, name='search_services'),
+    path('services/', views.service_catalog, name='service_catalog'),  # Каталог услуг с фильтрами
     # Новые маршруты для CRUD врачей:
     path('doctors/', views.doctor_list, name='doctor_list'),  # Список всех врачей
     path('doctor/<int:pk>/', views.doctor_detail, name='doctor_detail'),  # Просмотр одного
@@ -1,28 +1,20 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q, Count, Avg
-from django.utils import timezone
-from .models import Service, Doctor, Promotion, Review
+from django.db.models import Q, Prefetch
+from .models import Service, Doctor, Review
 from django.contrib import messages
 from django.views.decorators.http import require_POST
-from .forms import DoctorForm
+from .forms import DoctorForm, ServiceFilterForm
+from .catalog import price_facets
+from .promotions import get_active_promotions
+from .sections import get_top_doctors
 
 
 def index(request):
-    # 1. Получаем активные акции
-    today = timezone.now().date()
-    active_promotions = Promotion.objects.filter(
-        start_date__lte=today, 
-        end_date__gte=today
-    ).order_by('-start_date')[:3]
+    # 1. Получаем активные акции (из кэша, который живет до следующей смены акций)
+    active_promotions = get_active_promotions()[:3]
 
     # 2. УБИРАЕМ featured_doctors - оставляем ТОЛЬКО врачей с лучшими отзывами
-    doctors_with_rating = Doctor.objects.annotate(
-        avg_rating=Avg('reviews__rating'),
-        reviews_count=Count('reviews')
-    ).filter(
-        avg_rating__isnull=False,
-        reviews_count__gte=1
-    ).order_by('-avg_rating')[:3]  # Берем топ-3 врача по рейтингу
+    doctors_with_rating = get_top_doctors()  # Топ-3 врача по рейтингу (из кэша)
 
     # 3. Получаем одобренные отзывы
     reviews = Review.objects.filter(is_approved=True).order_by('-created_at')[:5]
@@ -63,6 +55,35 @@ def search_services(request):
     }
     return render(request, 'clinic/search_results.html', context)
 
+def service_catalog(request):
+    form = ServiceFilterForm(request.GET)
+    # Врачи подгружаются одним запросом через ServiceDoctor, их специализации - вторым
+    services = Service.objects.filter(is_active=True).prefetch_related(
+        Prefetch('doctors', queryset=Doctor.objects.prefetch_related('specializations').order_by('last_name', 'first_name'))
+    )
+
+    # Невалидное поле показывается с ошибкой, остальные фильтры все равно применяются
+    form.is_valid()
+    filters = form.cleaned_data
+    if filters.get('price_min') is not None:
+        services = services.filter(price__gte=filters['price_min'])
+    if filters.get('price_max') is not None:
+        services = services.filter(price__lte=filters['price_max'])
+    if filters.get('doctor'):
+        services = services.filter(doctors=filters['doctor'])
+    if filters.get('specialization'):
+        services = services.filter(doctors__specializations=filters['specialization']).distinct()
+    sort = filters.get('sort') or 'name'
+
+    services = list(services.order_by(sort, 'pk'))
+    context = {
+        'form': form,
+        'services': services,
+        'results_count': len(services),
+        'price_facets': price_facets(),  # Счетчики из индекса цен в памяти, без запросов
+    }
+    return render(request, 'clinic/service_catalog.html', context)
+
 # CRUD для Doctor
 def doctor_list(request):
     doctors = Doctor.objects.all().order_by('last_name', 'first_name')
@@ -79,6 +100,8 @@ def doctor_create(request):
         if form.is_valid():
             new_doctor = form.save()
             messages.success(request, f'Врач {new_doctor.first_name} {new_doctor.last_name} успешно добавлен!')
+            if new_doctor.photo_pending:
+                messages.info(request, 'Фотография обрабатывается и появится через несколько секунд.')
             return redirect('clinic:doctor_detail', pk=new_doctor.pk)
     else:
         form = DoctorForm()
@@ -92,6 +115,8 @@ def doctor_update(request, pk):
         if form.is_valid():
             updated_doctor = form.save()
             messages.success(request, f'Данные врача {updated_doctor.first_name} {updated_doctor.last_name} обновлены!')
+            if updated_doctor.photo_pending:
+                messages.info(request, 'Новая фотография обрабатывается и появится через несколько секунд.')
             return redirect('clinic:doctor_detail', pk=doctor.pk)
     else:
         form = DoctorForm(instance=doctor)
@@ -0,0 +1,12 @@
+from django.urls import path, include
+from django.conf import settings
+from django.conf.urls.static import static
+
+# Публичные URL без админки - для воркеров с DJANGO_LAZY_ADMIN=1
+urlpatterns = [
+    path('', include('clinic.urls')),
+]
+
+# Эта строка добавляет маршрутизацию для медиа-файлов только в режиме отладки (DEBUG=True)
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -9,9 +9,13 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# Воркеры публичного трафика запускаются с DJANGO_LAZY_ADMIN=1: админка
+# (admin.py всех приложений и ее URL) загружается только при первом запросе к /admin/
+LAZY_ADMIN = os.environ.get('DJANGO_LAZY_ADMIN') == '1'
+
 INSTALLED_APPS = [
     'clinic',
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig' if LAZY_ADMIN else 'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -29,8 +33,35 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Кэш общий для всех воркеров: на нем держатся сессии и кэши секций главной страницы.
+# Redis (нужен пакет redis) включается через DJANGO_REDIS_URL, иначе используется
+# файловый кэш - он общий для всех процессов на одном сервере.
+if os.environ.get('DJANGO_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['DJANGO_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(BASE_DIR, '.django_cache'),
+        }
+    }
+
+# Сессии читаются из общего кэша и пишутся в БД только при изменении (вход в админку)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# Сообщения хранятся только в cookie и никогда не создают сессию для анонимных посетителей
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 ROOT_URLCONF = 'config.urls'
 
+if LAZY_ADMIN:
+    ROOT_URLCONF = 'config.public_urls'
+    MIDDLEWARE.insert(0, 'clinic.middleware.LazyAdminURLConfMiddleware')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -52,6 +83,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение, открытое при прогреве, переживает первые запросы
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -87,4 +121,16 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')  # Для collectstatic
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Загрузки крупнее 256 КБ пишутся во временный файл, а не держатся в памяти
+# (стандартные обработчики: сначала MemoryFileUploadHandler, затем TemporaryFileUploadHandler)
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# Фотографии врачей
+DOCTOR_PHOTO_MAX_UPLOAD_SIZE = 20 * 1024 * 1024  # Максимальный размер исходника
+DOCTOR_PHOTO_MAX_SIDE = 1200  # Максимальная сторона после обработки, px
+PHOTO_PROCESSING_WORKERS = 2  # Процессов в пуле обработки изображений
+
+# Прогрев воркера при загрузке WSGI-приложения (см. clinic/startup.py)
+WARMUP_ON_START = os.environ.get('DJANGO_WARMUP_ON_START', '1') == '1'
@@ -1,13 +1,12 @@
 from django.contrib import admin
-from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
+from django.urls import path
+
+from .public_urls import urlpatterns as public_urlpatterns
+
+# При DJANGO_LAZY_ADMIN=1 автопоиск admin.py не выполняется при старте,
+# поэтому запускаем его здесь - этот модуль импортируется при первом запросе к /admin/
+admin.autodiscover()
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', include('clinic.urls')), # Подключим будущие URL-адреса приложения clinic
-]
-
-# Эта строка добавляет маршрутизацию для медиа-файлов только в режиме отладки (DEBUG=True)
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+] + public_urlpatterns
@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Воркер прогревается до того, как начнет принимать запросы.
+# С gunicorn --preload модуль импортирует мастер: шаблоны и кэши прогреваются один раз,
+# а соединения с БД закрываются перед fork() и открываются заново в каждом воркере.
+if settings.WARMUP_ON_START:
+    from clinic.startup import close_connections_before_fork, open_connections_after_fork, warm_up_safely
+    warm_up_safely()
+    os.register_at_fork(before=close_connections_before_fork, after_in_child=open_connections_after_fork)